@@ -1,6 +1,11 @@
+import os
 import streamlit as st
 import matplotlib.pyplot as plt
-from models import QuestionDataset, QuizGenerator, QuizCorrector
+from models import QuestionDataset, QuizGenerator, AdaptiveQuizGenerator, IncrementalCorrector, ChoiceShuffler
+from recorder import SessionRecorder
+
+# Answer streams are recorded here for replay.py when set
+RECORD_FILE = os.environ.get("QUIZ_RECORD_FILE")
 
 class QuizView:
     """
@@ -22,6 +27,18 @@ class QuizView:
             st.session_state.correction_results = None
         if 'num_questions' not in st.session_state:
             st.session_state.num_questions = 10
+        if 'corrector' not in st.session_state:
+            st.session_state.corrector = None
+        if 'shuffler' not in st.session_state:
+            st.session_state.shuffler = None
+        if 'recorder' not in st.session_state:
+            st.session_state.recorder = None
+        if 'practice_mode' not in st.session_state:
+            st.session_state.practice_mode = False
+        if 'adaptive_mode' not in st.session_state:
+            st.session_state.adaptive_mode = False
+        if 'ability' not in st.session_state:
+            st.session_state.ability = 0.0
 
     def reset_quiz(self):
         """Reset the quiz state"""
@@ -30,6 +47,9 @@ class QuizView:
         st.session_state.user_answers = {}
         st.session_state.quiz_corrected = False
         st.session_state.correction_results = None
+        st.session_state.corrector = None
+        st.session_state.shuffler = None
+        st.session_state.recorder = None
         st.success("Quiz reset successfully!")
         st.rerun()
 
@@ -87,12 +107,27 @@ class QuizView:
                     st.session_state.num_questions += 5
                     st.rerun()
 
+        st.sidebar.markdown("")
+        st.sidebar.checkbox(
+            "Practice mode",
+            key="practice_mode",
+            help="Show the score of each answer while you take the quiz"
+        )
+        st.sidebar.checkbox(
+            "Adaptive difficulty",
+            key="adaptive_mode",
+            help="Pick questions matching your estimated level instead of at random"
+        )
+
         return selected_tags, st.session_state.num_questions
 
 
     def generate_quiz(self, selected_tags, num_questions):
         """Generate a new quiz based on selected criteria"""
-        generator = QuizGenerator(self.dataset)
+        if st.session_state.adaptive_mode:
+            generator = AdaptiveQuizGenerator(self.dataset, ability=st.session_state.ability)
+        else:
+            generator = QuizGenerator(self.dataset)
         questions = generator.generate_quiz(selected_tags, num_questions)
         
         if len(questions) == 0:
@@ -105,6 +140,14 @@ class QuizView:
         st.session_state.quiz_generated = True
         st.session_state.quiz_corrected = False
         st.session_state.correction_results = None
+        st.session_state.shuffler = ChoiceShuffler(questions)
+        st.session_state.recorder = None
+        on_change = None
+        if RECORD_FILE:
+            st.session_state.recorder = SessionRecorder(RECORD_FILE, questions, selected_tags, num_questions,
+                                                        st.session_state.shuffler.seed)
+            on_change = st.session_state.recorder.record_answer
+        st.session_state.corrector = IncrementalCorrector(questions, st.session_state.shuffler, on_change)
         
         st.success(f"Quiz generated with {len(questions)} questions!")
         st.rerun()
@@ -118,7 +161,13 @@ class QuizView:
         st.header("Quiz Questions")
         st.markdown("---")
         
+        shuffler = st.session_state.shuffler
+        
         for idx, question in enumerate(st.session_state.questions):
+            # Widgets hold displayed positions; the shuffler gives the text shown at each one
+            positions = list(range(len(question.choices)))
+            format_choice = lambda position, idx=idx, question=question: shuffler.label(idx, question, position)
+            
             with st.container():
                 st.markdown(f"### Question {idx + 1}")
                 st.markdown(f"**{question.question}**")
@@ -161,12 +210,12 @@ class QuizView:
                     
                     default_value = st.session_state.user_answers.get(idx, None)
                     
-                    if default_value and default_value in question.choices:
-                        default_index = question.choices.index(default_value)
+                    if default_value is not None and default_value in positions:
                         answer = st.radio(
                             "options",
-                            options=question.choices,
-                            index=default_index,
+                            options=positions,
+                            format_func=format_choice,
+                            index=default_value,
                             key=f"q_{idx}",
                             disabled=st.session_state.quiz_corrected,
                             label_visibility="collapsed"
@@ -174,13 +223,16 @@ class QuizView:
                     else:
                         answer = st.radio(
                             "options",
-                            options=question.choices,
+                            options=positions,
+                            format_func=format_choice,
+                            index=None,
                             key=f"q_{idx}",
                             disabled=st.session_state.quiz_corrected,
                             label_visibility="collapsed"
                         )
                     
                     st.session_state.user_answers[idx] = answer
+                    st.session_state.corrector.update(idx, answer)
 
                 else:
                     st.markdown("<div style='font-weight:600; margin-bottom:6px;'>Your answers:</div>", unsafe_allow_html=True)
@@ -189,7 +241,8 @@ class QuizView:
 
                     answers = st.multiselect(
                         "Choose options",
-                        options=question.choices,
+                        options=positions,
+                        format_func=format_choice,
                         default=default_values,
                         key=f"q_{idx}",
                         placeholder="Choose options",
@@ -198,6 +251,13 @@ class QuizView:
                     )
 
                     st.session_state.user_answers[idx] = answers
+                    st.session_state.corrector.update(idx, answers)
+
+                # Live feedback in practice mode, read from the running correction
+                if st.session_state.practice_mode and not st.session_state.quiz_corrected:
+                    result = st.session_state.corrector.get_result(idx)
+                    if result['user_answer']:
+                        st.caption(f"Current score: {result['score']:.2f}/1.00")
 
 
     def submit_and_correct(self):
@@ -210,11 +270,16 @@ class QuizView:
             st.info("Quiz already corrected. Reset to try again.")
             return
         
-        corrector = QuizCorrector()
-        results = corrector.correct_quiz(
-            st.session_state.questions,
-            st.session_state.user_answers
-        )
+        results = st.session_state.corrector.get_results()
+        if st.session_state.recorder is not None:
+            st.session_state.recorder.record_submit()
+        
+        # Update the learner and question ratings from the scores
+        if st.session_state.adaptive_mode:
+            generator = AdaptiveQuizGenerator(self.dataset, ability=st.session_state.ability)
+            for question, result in zip(st.session_state.questions, results['results']):
+                generator.record(question, result['score'])
+            st.session_state.ability = generator.ability
         
         st.session_state.correction_results = results
         st.session_state.quiz_corrected = True
@@ -249,7 +314,7 @@ class QuizView:
             """, unsafe_allow_html=True)
         
         with col3:
-            correct_count = sum(1 for r in results['results'] if r['is_correct'])
+            correct_count = results['correct_count']
             st.markdown(f"""
             <div style='text-align: center; padding: 25px; background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); border-radius: 15px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
                 <h3 style='margin: 0; font-size: 16px; color: white;'>Correct</h3>
@@ -285,9 +350,9 @@ class QuizView:
         ax1.grid(axis='y', alpha=0.3, linestyle='--')
         ax1.set_facecolor('#fafafa')
         
-        correct = sum(1 for r in results['results'] if r['is_correct'])
-        partial = sum(1 for r in results['results'] if 0 < r['score'] < 1.0)
-        incorrect = sum(1 for r in results['results'] if r['score'] == 0)
+        correct = results['correct_count']
+        partial = results['partial_count']
+        incorrect = results['incorrect_count']
         
         pie_data = [correct, partial, incorrect]
         pie_labels = [f'Correct\n({correct})', f'Partial\n({partial})', f'Incorrect\n({incorrect})']
@@ -543,6 +608,7 @@ try:
             <div style='padding: 20px; background-color: white; border-radius: 12px; border: 3px solid {color}; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
                 <h3 style='margin: 0 0 15px 0; color: {color};'>Quiz Info</h3>
                 <p style='margin: 8px 0; color: #000;'><strong>Questions:</strong> {len(st.session_state.questions)}</p>
+                {f"<p style='margin: 8px 0; color: #000;'><strong>Ability:</strong> {st.session_state.ability:+.2f}</p>" if st.session_state.adaptive_mode else ""}
             </div>
             """, unsafe_allow_html=True)
     
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import sys
+import zlib
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+MAGIC = b"QZB1\n"
+READ_SIZE = 64 * 1024
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_GROWTH = 2
+
+
+def is_bundle(filepath):
+    """Return True if the file starts with the bundle magic bytes"""
+    with open(filepath, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _bucket_of(item, buckets):
+    """
+    Chunk of a question, derived from its text.
+    Editing, adding or removing a question only changes its own chunk.
+    """
+    return zlib.crc32(item['question'].encode('utf-8')) % buckets
+
+
+def _encode_chunk(items):
+    """Serialize a chunk as JSON lines, sorted so equal content gives equal bytes"""
+    lines = sorted(json.dumps(item, ensure_ascii=False, sort_keys=True) for item in items)
+    return "".join(line + "\n" for line in lines).encode('utf-8')
+
+
+def _compress(data, codec):
+    if codec == 'zstd':
+        return zstd.compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompressor(codec):
+    if codec == 'zstd':
+        if zstd is None:
+            raise ValueError("This bundle is zstd compressed but zstd is not available")
+        return zstd.ZstdDecompressor()
+    if codec == 'zlib':
+        return zlib.decompressobj()
+    raise ValueError(f"Unknown bundle codec: {codec}")
+
+
+def write_bundle(items, filepath, base=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 growth=DEFAULT_GROWTH, codec=None):
+    """
+    Write questions as a chunked, compressed bundle.
+
+    Args:
+        items: List of question dicts (same keys as quiz_dataset.json)
+        filepath: Output file
+        base: Manifest of a previous bundle. When given, a delta bundle is
+              written: it keeps the base chunking and only stores the chunks
+              the base does not already have
+        chunk_size: Target number of questions per chunk (full bundles only)
+        growth: Factor the bank may grow by before chunks exceed chunk_size.
+                Deltas keep the number of chunks of their base, so once the
+                bank outgrows it, write a new full bundle to re-chunk
+        codec: 'zstd' or 'zlib', defaults to zstd when available
+
+    Returns:
+        The manifest of the written bundle
+    """
+    if base is not None:
+        buckets = base['buckets']
+        codec = base['codec']
+        known = {chunk['id'] for chunk in base['chunks']}
+    else:
+        buckets = max(1, -(-len(items) * growth // chunk_size))
+        codec = codec or ('zstd' if zstd is not None else 'zlib')
+        known = set()
+
+    grouped = [[] for _ in range(buckets)]
+    for item in items:
+        grouped[_bucket_of(item, buckets)].append(item)
+
+    chunks = []
+    blobs = []
+    offset = 0
+    for group in grouped:
+        if not group:
+            continue
+        data = _encode_chunk(group)
+        chunk = {'id': hashlib.sha256(data).hexdigest(), 'count': len(group)}
+        if chunk['id'] not in known:
+            blob = _compress(data, codec)
+            chunk['offset'] = offset
+            chunk['length'] = len(blob)
+            offset += len(blob)
+            blobs.append(blob)
+        chunks.append(chunk)
+
+    bundle_id = hashlib.sha256("\n".join(c['id'] for c in chunks).encode('ascii')).hexdigest()
+    manifest = {
+        'id': bundle_id,
+        'base': base['id'] if base is not None else None,
+        'codec': codec,
+        'buckets': buckets,
+        'chunks': chunks
+    }
+
+    with open(filepath, 'wb') as f:
+        f.write(MAGIC)
+        f.write(json.dumps(manifest).encode('utf-8') + b"\n")
+        for blob in blobs:
+            f.write(blob)
+
+    return manifest
+
+
+class BundleReader:
+    """
+    Reads a bundle written by write_bundle().
+    - The manifest is read when the file is opened.
+    - Chunks are read on demand and decompressed as a stream.
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a quiz bundle: {filepath}")
+            self.manifest = json.loads(self._file.readline())
+        except (ValueError, UnicodeDecodeError):
+            self._file.close()
+            raise ValueError(f"Invalid bundle file: {filepath}")
+        self._data_start = self._file.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def iter_items(self, chunk):
+        """
+        Stream the questions of one chunk stored in this file.
+
+        Args:
+            chunk: Chunk entry of the manifest
+
+        Returns:
+            Generator of question dicts
+        """
+        if 'offset' not in chunk:
+            raise ValueError(f"Chunk {chunk['id']} is not stored in {self.filepath}")
+
+        self._file.seek(self._data_start + chunk['offset'])
+        decompressor = _decompressor(self.manifest['codec'])
+        digest = hashlib.sha256()
+        remaining = chunk['length']
+        pending = b""
+
+        while remaining > 0:
+            block = self._file.read(min(READ_SIZE, remaining))
+            if not block:
+                raise ValueError(f"Truncated bundle file: {self.filepath}")
+            remaining -= len(block)
+            data = decompressor.decompress(block)
+            digest.update(data)
+            *lines, pending = (pending + data).split(b"\n")
+            for line in lines:
+                yield json.loads(line)
+
+        if pending or digest.hexdigest() != chunk['id']:
+            raise ValueError(f"Corrupted chunk {chunk['id']} in {self.filepath}")
+
+
+if __name__ == "__main__":
+    # python bundle.py build quiz_dataset.json quiz.qzb
+    # python bundle.py delta quiz.qzb new_dataset.json update.qzd
+    if len(sys.argv) == 4 and sys.argv[1] == "build":
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            manifest = write_bundle(json.load(f), sys.argv[3])
+    elif len(sys.argv) == 5 and sys.argv[1] == "delta":
+        with BundleReader(sys.argv[2]) as reader:
+            base = reader.manifest
+        with open(sys.argv[3], 'r', encoding='utf-8') as f:
+            manifest = write_bundle(json.load(f), sys.argv[4], base=base)
+    else:
+        sys.exit("usage: bundle.py build DATASET.json OUT | bundle.py delta BASE DATASET.json OUT")
+
+    stored = sum(1 for chunk in manifest['chunks'] if 'offset' in chunk)
+    print(f"{sys.argv[-1]}: {len(manifest['chunks'])} chunks, {stored} stored, id {manifest['id'][:12]}")
@@ -0,0 +1,115 @@
+import csv
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FIELDS = [
+    'session', 'submitted', 'index', 'question', 'mode',
+    'user_answer', 'correct_answers', 'score', 'is_correct'
+]
+FORMATS = ('csv', 'jsonl', 'parquet')
+PARQUET_BATCH_SIZE = 10000
+
+
+def iter_result_rows(graded_sessions):
+    """
+    Flatten graded quizzes into one row per question.
+
+    Args:
+        graded_sessions: Iterable of (session_id, submitted, results) where results
+                         is the dict returned by QuizCorrector.correct_quiz
+
+    Returns:
+        Generator of row dicts with the keys of FIELDS
+    """
+    for session_id, submitted, results in graded_sessions:
+        for idx, result in enumerate(results['results']):
+            yield {
+                'session': session_id,
+                'submitted': submitted,
+                'index': idx,
+                'question': result['question'],
+                'mode': result['mode'],
+                'user_answer': json.dumps(result['user_answer'], ensure_ascii=False),
+                'correct_answers': json.dumps(result['correct_answers'], ensure_ascii=False),
+                'score': float(result['score']),
+                'is_correct': result['is_correct']
+            }
+
+
+def _write_csv(rows, filepath):
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_jsonl(rows, filepath):
+    with open(filepath, 'w', encoding='utf-8') as f:
+        count = 0
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _write_parquet(rows, filepath):
+    if pa is None:
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([
+        ('session', pa.string()),
+        ('submitted', pa.bool_()),
+        ('index', pa.int32()),
+        ('question', pa.string()),
+        ('mode', pa.string()),
+        ('user_answer', pa.string()),
+        ('correct_answers', pa.string()),
+        ('score', pa.float64()),
+        ('is_correct', pa.bool_())
+    ])
+
+    count = 0
+    batch = []
+    with pq.ParquetWriter(filepath, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == PARQUET_BATCH_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def export_results(rows, filepath, fmt='csv'):
+    """
+    Stream result rows to a file. Rows are consumed one at a time, so memory
+    stays bounded whatever the number of sessions (one batch for Parquet).
+
+    Args:
+        rows: Iterable of row dicts, e.g. from iter_result_rows()
+        filepath: Output file
+        fmt: 'csv', 'jsonl' or 'parquet'
+
+    Returns:
+        Number of rows written
+    """
+    if fmt == 'csv':
+        return _write_csv(rows, filepath)
+    if fmt == 'jsonl':
+        return _write_jsonl(rows, filepath)
+    if fmt == 'parquet':
+        return _write_parquet(rows, filepath)
+    raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(FORMATS)})")
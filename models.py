@@ -1,5 +1,9 @@
 import json
+import math
 import random
+import threading
+from array import array
+from bundle import BundleReader, is_bundle
 
 class Question:
     """
@@ -9,13 +13,17 @@ class Question:
     - correct: List of correct answers.
     - mode: 'single' or 'multiple'.
     - tags: List of fields/tags for filtering.
+    - difficulty: Estimated difficulty, on the logit scale (0 = average).
+    - attempts: Number of scores the difficulty was estimated from.
     """
-    def __init__(self, question, choices, correct, mode, tags):
+    def __init__(self, question, choices, correct, mode, tags, difficulty=0.0):
         self.question = question
         self.choices = choices
         self.correct = correct
         self.mode = mode
         self.tags = tags
+        self.difficulty = difficulty
+        self.attempts = 0
     
     def __repr__(self):
         return f"Question(mode={self.mode}, tags={self.tags})"
@@ -23,9 +31,13 @@ class Question:
 
 class QuestionDataset:
     """
-    Singleton class to load quiz questions from a JSON file.
+    Singleton class to load quiz questions from a JSON file or a bundle.
     - Loads all questions as Question objects.
     - Provides a method to get all unique tags for filtering.
+    - Bundles can be updated in place with delta bundles (see bundle.py).
+    - Difficulty indexes (all questions and one per tag) are built on load.
+    - lock guards question difficulties and difficulty indexes, which all
+      sessions share.
     """
     _instance = None
     
@@ -44,29 +56,81 @@ class QuestionDataset:
         
         self.filepath = filepath
         self.questions = []
+        self.bundle_id = None
+        self._chunks = {}
+        self._difficulty_indexes = {}
+        self.lock = threading.RLock()
         self._load_questions()
         self._initialized = True
     
     def _load_questions(self):
-        """Load questions from JSON file"""
+        """Load questions from JSON file or bundle"""
         try:
+            if is_bundle(self.filepath):
+                self._load_bundle(self.filepath, base_id=None)
+                return
+            
             with open(self.filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
             for item in data:
-                question = Question(
-                    question=item['question'],
-                    choices=item['choices'],
-                    correct=item['correct'],
-                    mode=item['mode'],
-                    tags=item['tags']
-                )
-                self.questions.append(question)
+                self.questions.append(self._make_question(item))
+            self._difficulty_indexes = self._build_difficulty_indexes(self.questions)
         except FileNotFoundError:
             raise FileNotFoundError(f"Quiz dataset file not found: {self.filepath}")
         except json.JSONDecodeError:
             raise ValueError(f"Invalid JSON format in file: {self.filepath}")
     
+    @staticmethod
+    def _make_question(item):
+        """Build a Question from its JSON dict"""
+        return Question(
+            question=item['question'],
+            choices=item['choices'],
+            correct=item['correct'],
+            mode=item['mode'],
+            tags=item['tags'],
+            difficulty=item.get('difficulty', 0.0)
+        )
+    
+    def _load_bundle(self, filepath, base_id):
+        """
+        Load a bundle, reusing the chunks already in memory.
+        Only chunks with an unknown id are read and decompressed.
+        """
+        with BundleReader(filepath) as reader:
+            manifest = reader.manifest
+            if manifest['base'] != base_id:
+                raise ValueError(f"Bundle {filepath} does not apply to the loaded dataset")
+            
+            chunks = {}
+            for chunk in manifest['chunks']:
+                if chunk['id'] in self._chunks:
+                    chunks[chunk['id']] = self._chunks[chunk['id']]
+                else:
+                    chunks[chunk['id']] = [
+                        self._make_question(item) for item in reader.iter_items(chunk)
+                    ]
+        
+        questions = [q for chunk_questions in chunks.values() for q in chunk_questions]
+        indexes = self._build_difficulty_indexes(questions)
+        with self.lock:
+            self._chunks = chunks
+            self._difficulty_indexes = indexes
+            self.bundle_id = manifest['id']
+            self.questions = questions
+    
+    def apply_delta(self, filepath):
+        """
+        Apply a delta bundle that adds, modifies or removes questions.
+        
+        Args:
+            filepath: Delta bundle written against the currently loaded bundle
+        """
+        if self.bundle_id is None:
+            raise ValueError("Delta bundles can only be applied to a dataset loaded from a bundle")
+        self._load_bundle(filepath, base_id=self.bundle_id)
+    
     def get_all_tags(self):
         """Get all unique tags from all questions"""
         tags = set()
@@ -77,6 +141,151 @@ class QuestionDataset:
     def get_questions(self):
         """Return all questions"""
         return self.questions
+    
+    @staticmethod
+    def _build_difficulty_indexes(questions):
+        """Build the DifficultyIndex of all questions (key None) and of each tag"""
+        questions_by_tag = {}
+        for question in questions:
+            for tag in set(question.tags):
+                questions_by_tag.setdefault(tag, []).append(question)
+        
+        indexes = {None: DifficultyIndex(questions)}
+        for tag, tag_questions in questions_by_tag.items():
+            indexes[tag] = DifficultyIndex(tag_questions)
+        return indexes
+    
+    def get_difficulty_indexes(self, selected_tags=None):
+        """
+        Return the (tag, DifficultyIndex) pairs of the selected tags, in order,
+        or the index of all questions (tag None) if no tag is selected.
+        Unknown tags are skipped.
+        """
+        if not selected_tags:
+            return [(None, self._difficulty_indexes[None])]
+        return [
+            (tag, self._difficulty_indexes[tag])
+            for tag in dict.fromkeys(selected_tags)
+            if tag in self._difficulty_indexes
+        ]
+    
+    def update_difficulty(self, question, old_difficulty):
+        """Move a question whose difficulty changed in the global index and its tags' indexes"""
+        with self.lock:
+            for key in [None, *set(question.tags)]:
+                self._difficulty_indexes[key].move(question, old_difficulty)
+
+
+class DifficultyIndex:
+    """
+    Questions grouped by estimated difficulty.
+    - Each bucket covers a fixed range of difficulty, so the questions
+      closest to a target are found without scanning the bank.
+    - A question whose difficulty changed is moved between buckets in O(1).
+    - Not thread-safe: callers hold QuestionDataset.lock.
+    """
+    WIDTH = 0.1
+    LIMIT = 6.0
+    ATTEMPTS = 16
+    
+    def __init__(self, questions):
+        self.size = int(2 * self.LIMIT / self.WIDTH) + 1
+        self.buckets = [[] for _ in range(self.size)]
+        self.positions = {}
+        for question in questions:
+            self._add(question, self._key(question.difficulty))
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def _key(self, difficulty):
+        key = int((difficulty + self.LIMIT) / self.WIDTH + 0.5)
+        return min(max(key, 0), self.size - 1)
+    
+    def _add(self, question, key):
+        bucket = self.buckets[key]
+        self.positions[question] = len(bucket)
+        bucket.append(question)
+    
+    def _remove(self, question, key):
+        """Remove by swapping with the last question of the bucket"""
+        bucket = self.buckets[key]
+        position = self.positions.pop(question)
+        last = bucket.pop()
+        if last is not question:
+            bucket[position] = last
+            self.positions[last] = position
+    
+    def move(self, question, old_difficulty):
+        """Update the bucket of a question after its difficulty changed"""
+        old_key = self._key(old_difficulty)
+        new_key = self._key(question.difficulty)
+        if old_key != new_key and question in self.positions:
+            self._remove(question, old_key)
+            self._add(question, new_key)
+    
+    @staticmethod
+    def nearest(indexes, target, exclude, rng):
+        """
+        Pick a random question among those closest to a target difficulty,
+        from the union of several indexes.
+        
+        Args:
+            indexes: List of (tag, DifficultyIndex) pairs, as given by
+                     QuestionDataset.get_difficulty_indexes()
+            target: Wanted difficulty
+            exclude: Set of questions that must not be picked
+            rng: random.Random instance
+        
+        Returns:
+            Tuple (question, distance in buckets), or (None, None) if none is left
+        """
+        if not indexes:
+            return None, None
+        
+        first = indexes[0][1]
+        center = first._key(target)
+        for distance in range(first.size):
+            keys = (center, ) if distance == 0 else (center - distance, center + distance)
+            if len(keys) == 2 and rng.random() < 0.5:
+                keys = keys[::-1]
+            for key in keys:
+                if 0 <= key < first.size:
+                    buckets = [(tag, index.buckets[key]) for tag, index in indexes if index.buckets[key]]
+                    question = DifficultyIndex._pick(buckets, [tag for tag, _ in indexes], exclude, rng)
+                    if question is not None:
+                        return question, distance
+        return None, None
+    
+    @staticmethod
+    def _pick(buckets, tags, exclude, rng):
+        """
+        Pick uniformly from the union of same-key buckets of several indexes.
+        A question found in several buckets is only accepted from the bucket
+        of the first selected tag it has, so it is weighted once.
+        """
+        if not buckets:
+            return None
+        
+        def owner(question):
+            return next(tag for tag in tags if tag is None or tag in question.tags)
+        
+        total = sum(len(bucket) for _, bucket in buckets)
+        for _ in range(DifficultyIndex.ATTEMPTS * len(buckets)):
+            position = rng.randrange(total)
+            for tag, bucket in buckets:
+                if position < len(bucket):
+                    question = bucket[position]
+                    break
+                position -= len(bucket)
+            if question not in exclude and owner(question) == tag:
+                return question
+        # Almost only reached when most of the buckets is excluded, so they are small
+        candidates = [
+            q for tag, bucket in buckets for q in bucket
+            if q not in exclude and owner(q) == tag
+        ]
+        return rng.choice(candidates) if candidates else None
 
 
 class QuizGenerator:
@@ -113,55 +322,212 @@ class QuizGenerator:
         return random.sample(filtered_questions, num_questions)
 
 
+class AdaptiveQuizGenerator(QuizGenerator):
+    """
+    Generates quizzes matched to the learner's estimated ability.
+    - Ability and question difficulty are Elo-style ratings on the logit
+      scale of the Rasch model: P(correct) = 1 / (1 + exp(difficulty - ability)).
+    - Each score updates both ratings in O(1).
+    - Questions are picked from the dataset's DifficultyIndex, never by
+      rescanning the bank.
+    """
+    LEARNER_K = 0.4
+    ITEM_K = 0.4
+    ITEM_DECAY = 0.05
+    
+    def __init__(self, dataset, ability=0.0, target_success=0.5, seed=None):
+        if not 0 < target_success < 1:
+            raise ValueError(f"target_success must be between 0 and 1 (exclusive), got {target_success}")
+        
+        super().__init__(dataset)
+        self.ability = ability
+        self.target_success = target_success
+        self.rng = random.Random(seed)
+    
+    def expected_score(self, question):
+        """Probability that the learner answers the question correctly"""
+        return 1 / (1 + math.exp(question.difficulty - self.ability))
+    
+    def next_question(self, selected_tags=None, exclude=()):
+        """
+        Pick the question whose difficulty best matches the learner.
+        
+        Args:
+            selected_tags: List of tags to filter questions
+            exclude: Set of questions already asked
+        
+        Returns:
+            A Question, or None if no question is left
+        """
+        target = self.ability - math.log(self.target_success / (1 - self.target_success))
+        
+        with self.dataset.lock:
+            indexes = self.dataset.get_difficulty_indexes(selected_tags)
+            question, _ = DifficultyIndex.nearest(indexes, target, exclude, self.rng)
+        return question
+    
+    def generate_quiz(self, selected_tags=None, num_questions=10):
+        """
+        Generate a quiz with the questions closest to the learner's level.
+        
+        Args:
+            selected_tags: List of tags to filter questions
+            num_questions: Number of questions to include in quiz
+        
+        Returns:
+            List of Question objects
+        """
+        questions = []
+        seen = set()
+        while len(questions) < num_questions:
+            question = self.next_question(selected_tags, seen)
+            if question is None:
+                break
+            questions.append(question)
+            seen.add(question)
+        return questions
+    
+    def record(self, question, score):
+        """
+        Update the learner ability and question difficulty from one score.
+        
+        Args:
+            question: The Question that was answered
+            score: Its score between 0 and 1, as given by QuizCorrector
+        """
+        with self.dataset.lock:
+            surprise = score - self.expected_score(question)
+            old_difficulty = question.difficulty
+            
+            self.ability += self.LEARNER_K * surprise
+            question.difficulty -= self.ITEM_K / (1 + self.ITEM_DECAY * question.attempts) * surprise
+            question.attempts += 1
+            self.dataset.update_difficulty(question, old_difficulty)
+
+
+class ChoiceShuffler:
+    """
+    Per-session order of the choices of a quiz.
+    - Questions are never copied: the order of every question is stored
+      in one flat permutation array, indexed through an offsets array.
+    - The same seed always gives the same order.
+    - Answers are given as displayed positions and mapped back to the
+      original choices with unshuffle().
+    """
+    def __init__(self, questions, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.offsets = array('I', [0])
+        self.order = array('H')
+        
+        rng = random.Random(self.seed)
+        for question in questions:
+            permutation = list(range(len(question.choices)))
+            rng.shuffle(permutation)
+            self.order.extend(permutation)
+            self.offsets.append(len(self.order))
+    
+    def label(self, idx, question, position):
+        """Return the choice text displayed at a position of question idx"""
+        return question.choices[self.order[self.offsets[idx] + position]]
+    
+    def unshuffle(self, idx, question, user_answer):
+        """
+        Map displayed positions back to the original choices.
+        
+        Args:
+            idx: Index of the question in the quiz
+            question: The Question object at idx
+            user_answer: Position for single mode, list of positions for multiple mode
+        
+        Returns:
+            The chosen choice text(s), as expected by QuizCorrector
+        """
+        if user_answer is None:
+            return None
+        if question.mode == 'single':
+            return self.label(idx, question, user_answer)
+        return [self.label(idx, question, position) for position in user_answer]
+
+
 class QuizCorrector:
     """
     Corrects a quiz and calculates scores.
     """
     @staticmethod
-    def correct_quiz(questions, user_answers):
+    def correct_quiz(questions, user_answers, shuffler=None):
         """
         Correct quiz and calculate scores.
         
         Args:
             questions: List of Question objects
             user_answers: Dict mapping question index to user's answer(s)
+            shuffler: ChoiceShuffler used to display the quiz, if any
         
         Returns:
             Dict containing scores, total_score, and detailed results
         """
         results = []
-        total_score = 0
         max_score = len(questions)
+        counts = {'correct': 0, 'partial': 0, 'incorrect': 0}
         
         for idx, question in enumerate(questions):
             user_answer = user_answers.get(idx, None)
+            if shuffler is not None:
+                user_answer = shuffler.unshuffle(idx, question, user_answer)
+            score = QuizCorrector._score_question(question, user_answer)
             
-            if question.mode == 'single':
-                score = QuizCorrector._score_single_choice(
-                    question.correct, user_answer
-                )
-            else:  
-                score = QuizCorrector._score_multiple_choice(
-                    question.correct, user_answer
-                )
-            
-            total_score += score
-            
-            result = {
-                'question': question.question,
-                'mode': question.mode,
-                'correct_answers': question.correct,
-                'user_answer': user_answer,
-                'score': score,
-                'is_correct': score == 1.0
-            }
-            results.append(result)
+            counts[QuizCorrector._bucket(score)] += 1
+            results.append(QuizCorrector._build_result(question, user_answer, score))
         
+        return QuizCorrector._summarize(results, max_score, counts)
+    
+    @staticmethod
+    def _score_question(question, user_answer):
+        """Score one answer with the algorithm matching the question mode"""
+        if question.mode == 'single':
+            return QuizCorrector._score_single_choice(
+                question.correct, user_answer
+            )
+        return QuizCorrector._score_multiple_choice(
+            question.correct, user_answer
+        )
+    
+    @staticmethod
+    def _bucket(score):
+        """Return the result category of a score: correct, partial or incorrect"""
+        if score == 1.0:
+            return 'correct'
+        if score > 0:
+            return 'partial'
+        return 'incorrect'
+    
+    @staticmethod
+    def _build_result(question, user_answer, score):
+        """Build the detailed result entry of one question"""
+        return {
+            'question': question.question,
+            'mode': question.mode,
+            'correct_answers': question.correct,
+            'user_answer': user_answer,
+            'score': score,
+            'is_correct': score == 1.0
+        }
+    
+    @staticmethod
+    def _summarize(results, max_score, counts):
+        """
+        Build the correction dict shared by all correctors.
+        The total is summed exactly, so a quiz worth 7/10 gives exactly 70%.
+        """
+        total_score = math.fsum(r['score'] for r in results)
         return {
             'results': results,
             'total_score': total_score,
             'max_score': max_score,
-            'percentage': (total_score / max_score * 100) if max_score > 0 else 0
+            'percentage': (total_score / max_score * 100) if max_score > 0 else 0,
+            'correct_count': counts['correct'],
+            'partial_count': counts['partial'],
+            'incorrect_count': counts['incorrect']
         }
     
     @staticmethod
@@ -193,4 +559,60 @@ class QuizCorrector:
         
         score = correct_selected / len(correct_set) - wrong_selected / len(correct_set)
         
-        return max(0, score)
\ No newline at end of file
+        return max(0, score)
+
+
+class IncrementalCorrector(QuizCorrector):
+    """
+    Grades a quiz while it is being answered.
+    - Only the question whose answer changed is re-scored.
+    - Correct/partial/incorrect counts are kept up to date; the total is
+      summed from the cached scores, so it never drifts as answers change.
+    - An optional on_change(idx, user_answer) callback is called for every
+      changed answer.
+    """
+    def __init__(self, questions, shuffler=None, on_change=None):
+        self.questions = questions
+        self.shuffler = shuffler
+        self.on_change = on_change
+        self.answers = {}
+        self.results = [self._build_result(q, None, 0) for q in questions]
+        self.counts = {'correct': 0, 'partial': 0, 'incorrect': len(questions)}
+    
+    def update(self, idx, user_answer):
+        """
+        Record the answer of one question and update the running scores.
+        
+        Args:
+            idx: Index of the question in the quiz
+            user_answer: User's answer(s) for this question, as displayed
+                positions when the quiz uses a ChoiceShuffler
+        
+        Returns:
+            The result dict of the question
+        """
+        # An empty answer to an unanswered question is not a change
+        if self.answers.get(idx) == user_answer or (idx not in self.answers and user_answer == []):
+            return self.results[idx]
+        
+        question = self.questions[idx]
+        previous = self.results[idx]['score']
+        self.answers[idx] = user_answer
+        if self.on_change is not None:
+            self.on_change(idx, user_answer)
+        if self.shuffler is not None:
+            user_answer = self.shuffler.unshuffle(idx, question, user_answer)
+        score = self._score_question(question, user_answer)
+        
+        self.counts[self._bucket(previous)] -= 1
+        self.counts[self._bucket(score)] += 1
+        self.results[idx] = self._build_result(question, user_answer, score)
+        return self.results[idx]
+    
+    def get_result(self, idx):
+        """Return the current result of one question"""
+        return self.results[idx]
+    
+    def get_results(self):
+        """Return the correction dict, same format as QuizCorrector.correct_quiz"""
+        return self._summarize(list(self.results), len(self.questions), self.counts)
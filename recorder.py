@@ -0,0 +1,51 @@
+import hashlib
+import json
+import time
+import uuid
+
+
+def question_key(question):
+    """
+    Identify a question by its content.
+    The text alone is not enough: some questions share it with different choices.
+    """
+    content = json.dumps(
+        [question.question, question.choices, question.correct, question.mode, question.tags],
+        ensure_ascii=False
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class SessionRecorder:
+    """
+    Records the answer stream of one quiz session as JSON lines, for replay.py.
+    - One 'session' event with the quiz, then one 'answer' event per changed
+      answer and a 'submit' event.
+    - Events are appended as they happen, so several sessions can share a file.
+    - Answers are stored raw (displayed positions), replayed with the same
+      shuffle seed.
+    """
+    def __init__(self, filepath, questions, selected_tags, num_questions, shuffle_seed):
+        self.filepath = filepath
+        self.session_id = uuid.uuid4().hex
+        self._write({
+            'type': 'session',
+            'tags': selected_tags or [],
+            'num_questions': num_questions,
+            'questions': [question_key(q) for q in questions],
+            'shuffle_seed': shuffle_seed
+        })
+
+    def _write(self, event):
+        event['session'] = self.session_id
+        event['t'] = time.time()
+        with open(self.filepath, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def record_answer(self, idx, user_answer):
+        """Record the new answer of one question"""
+        self._write({'type': 'answer', 'idx': idx, 'answer': user_answer})
+
+    def record_submit(self):
+        """Record the submission of the quiz"""
+        self._write({'type': 'submit'})
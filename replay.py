@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import export
+from export import FORMATS, export_results, iter_result_rows
+from models import QuestionDataset, QuizGenerator, IncrementalCorrector, ChoiceShuffler
+from recorder import question_key
+
+# Sessions without events for this long are considered abandoned
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+class ReplayStats:
+    """
+    Replay time of the sessions, in bounded memory.
+    - Count and max are exact.
+    - The median is estimated from a fixed-size reservoir sample.
+    """
+    SAMPLE_SIZE = 10000
+
+    def __init__(self, seed=None):
+        self.count = 0
+        self.max = 0.0
+        self.sample = []
+        self._rng = random.Random(seed)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.max = max(self.max, elapsed)
+        if len(self.sample) < self.SAMPLE_SIZE:
+            self.sample.append(elapsed)
+        else:
+            position = self._rng.randrange(self.count)
+            if position < self.SAMPLE_SIZE:
+                self.sample[position] = elapsed
+
+    def median(self):
+        ordered = sorted(self.sample)
+        return ordered[len(ordered) // 2] if ordered else 0.0
+
+
+def iter_sessions(filepath, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Stream recorded sessions from a recording file.
+    A session is yielded as soon as it is submitted, or as abandoned once it
+    has had no event for idle_timeout seconds of recording time. Only the
+    sessions active within that window are held in memory.
+
+    Returns:
+        Generator of session dicts (the 'session' event plus 'answers' and 'submitted')
+    """
+    pending = OrderedDict()
+    last_seen = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            event = json.loads(line)
+            session_id = event['session']
+
+            # Sessions are kept in order of last activity: flush the idle ones
+            while pending:
+                oldest = next(iter(pending))
+                if event['t'] - last_seen[oldest] <= idle_timeout:
+                    break
+                del last_seen[oldest]
+                yield pending.pop(oldest)
+
+            if event['type'] == 'session':
+                pending[session_id] = dict(event, answers=[], submitted=False)
+            elif session_id not in pending:
+                continue
+            elif event['type'] == 'answer':
+                pending[session_id]['answers'].append(event)
+                pending.move_to_end(session_id)
+            elif event['type'] == 'submit':
+                del last_seen[session_id]
+                session = pending.pop(session_id)
+                session['submitted'] = True
+                session['submit_t'] = event['t']
+                yield session
+                continue
+            last_seen[session_id] = event['t']
+    yield from pending.values()
+
+
+_questions_by_key = None
+
+
+def _get_questions_by_key(dataset_path):
+    """Map question_key() to Question, built once per worker process"""
+    global _questions_by_key
+    if _questions_by_key is None:
+        dataset = QuestionDataset(dataset_path)
+        _questions_by_key = {question_key(q): q for q in dataset.get_questions()}
+    return _questions_by_key
+
+
+def replay_session(dataset_path, session, speed=0):
+    """
+    Re-drive one recorded session against QuizGenerator and QuizCorrector.
+
+    Args:
+        dataset_path: Dataset file (JSON or bundle) the session was recorded on
+        session: Session dict from iter_sessions()
+        speed: 0 to replay as fast as possible, otherwise a multiplier of the recorded pace
+
+    Returns:
+        Tuple (session_id, submitted, results, elapsed seconds)
+    """
+    start = time.perf_counter()
+    questions_by_key = _get_questions_by_key(dataset_path)
+
+    # Generation is replayed for its load; the recorded questions are graded
+    QuizGenerator(QuestionDataset(dataset_path)).generate_quiz(session['tags'], session['num_questions'])
+    try:
+        questions = [questions_by_key[key] for key in session['questions']]
+    except KeyError as e:
+        raise ValueError(f"Recorded question {e.args[0]} not found in {dataset_path}")
+
+    shuffler = ChoiceShuffler(questions, seed=session['shuffle_seed'])
+    corrector = IncrementalCorrector(questions, shuffler)
+
+    last_t = session['t']
+    for event in session['answers']:
+        if speed > 0:
+            time.sleep(max(0, event['t'] - last_t) / speed)
+            last_t = event['t']
+        corrector.update(event['idx'], event['answer'])
+
+    results = corrector.get_results()
+    return session['session'], session['submitted'], results, time.perf_counter() - start
+
+
+def replay(filepath, dataset_path, workers=None, speed=0, stats=None,
+           idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Replay all sessions of a recording concurrently in a process pool.
+    At most a few sessions per worker are in flight, and only sessions
+    active within idle_timeout are buffered (see iter_sessions()).
+
+    Args:
+        filepath: Recording written by SessionRecorder
+        dataset_path: Dataset file the sessions were recorded on
+        workers: Number of processes (default: number of CPUs)
+        speed: 0 to replay as fast as possible, otherwise a multiplier of the recorded pace
+        stats: Optional ReplayStats receiving the replay time of each session
+        idle_timeout: Seconds without events after which a session is abandoned
+
+    Returns:
+        Generator of (session_id, submitted, results), in completion order
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = workers * 4
+        in_flight = set()
+
+        for session in iter_sessions(filepath, idle_timeout):
+            if len(in_flight) >= limit:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from _collect(done, stats)
+            in_flight.add(executor.submit(replay_session, dataset_path, session, speed))
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from _collect(done, stats)
+
+
+def _collect(futures, stats):
+    for future in futures:
+        session_id, submitted, results, elapsed = future.result()
+        if stats is not None:
+            stats.add(elapsed)
+        yield session_id, submitted, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded quiz sessions and export the graded results")
+    parser.add_argument("recording", help="JSON lines file written by recorder.SessionRecorder")
+    parser.add_argument("output", help="Export file for the graded results")
+    parser.add_argument("--dataset", default="quiz_dataset.json", help="Dataset the sessions were recorded on")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--speed", type=float, default=0, help="0 = as fast as possible, 1 = recorded pace")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="Seconds without events after which an unsubmitted session is abandoned")
+    args = parser.parse_args()
+    if args.format == 'parquet' and export.pa is None:
+        parser.error("--format parquet requires pyarrow (pip install pyarrow)")
+
+    stats = ReplayStats()
+    start = time.perf_counter()
+    rows = iter_result_rows(replay(args.recording, args.dataset, args.workers, args.speed, stats,
+                                   args.idle_timeout))
+    count = export_results(rows, args.output, args.format)
+    elapsed = time.perf_counter() - start
+
+    print(f"{stats.count} sessions, {count} rows in {elapsed:.2f}s")
+    if stats.count:
+        print(f"session replay time: median {stats.median() * 1000:.1f}ms, "
+              f"max {stats.max * 1000:.1f}ms")